@@ -53,6 +53,7 @@ from .docgen import (
 from .visualize import (
     SVGRenderer,
     render_svg,
+    render_svg_to_file,
     render_svg_from_file,
 )
 from .state import (
@@ -146,6 +147,7 @@ __all__ = [
     # Visualization
     'SVGRenderer',
     'render_svg',
+    'render_svg_to_file',
     'render_svg_from_file',
     # State analysis
     'DelayBuffer',
@@ -2,18 +2,322 @@
 Screenshot Pure Data patches using macOS automation.
 
 Opens patches in Pd, captures screenshots, and closes them.
-Requires Pure Data to be installed.
+Requires Pure Data to be installed. When PyObjC is available, captures are
+encoded to PNG in memory; otherwise screencapture writes them to disk.
 """
 
+import atexit
+import hashlib
+import mmap
+import select
 import subprocess
+import tempfile
 import time
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Optional
+from typing import Callable, List, Optional, Tuple, TypeVar
 
+try:
+    import Quartz
+    from AppKit import NSBitmapImageRep, NSPNGFileType, NSWorkspace
+    HAS_PYOBJC = True
+except ModuleNotFoundError:
+    HAS_PYOBJC = False
 
+T = TypeVar("T")
+
+
+# Compiled AppleScripts are cached here, keyed by a hash of their source
+SCRIPT_CACHE_DIR = Path(tempfile.gettempdir()) / "pd-vibe-applescript"
+
+# Activate Pd, open a patch and report the frontmost window rectangle.
+# argv: pd_app, pd_path, wait_ms
+OPEN_FRONT_WINDOW_SCRIPT = '''
+on run argv
+    set pdApp to item 1 of argv
+    set pdPath to item 2 of argv
+    set waitMs to (item 3 of argv) as integer
+
+    tell application pdApp
+        activate
+        open POSIX file pdPath
+    end tell
+
+    delay waitMs / 1000
+
+    -- Find the patch window (should be frontmost)
+    tell application "System Events"
+        tell process "Pd"
+            set frontWindow to window 1
+            set windowBounds to position of frontWindow & size of frontWindow
+        end tell
+    end tell
+
+    set AppleScript's text item delimiters to ","
+    return windowBounds as text
+end run
+'''
+
+# Bring Pd to the front and report the rectangle of its frontmost window.
+FRONT_WINDOW_SCRIPT = '''
+on run argv
+    tell application "System Events"
+        tell process "Pd"
+            set frontWindow to window 1
+            set frontmost to true
+            delay 0.2
+            set windowBounds to position of frontWindow & size of frontWindow
+        end tell
+    end tell
+
+    set AppleScript's text item delimiters to ","
+    return windowBounds as text
+end run
+'''
+
+# Find a patch window by its title ("<file> - <dir>"), optionally resize it,
+# bring it to the front and report "x,y,w,h|title". A width of 0 keeps the
+# window's own size.
+# argv: file_name, patch_dir, width, height
+FIND_WINDOW_SCRIPT = '''
+on run argv
+    set fileName to item 1 of argv
+    set patchDir to item 2 of argv
+    set reqWidth to (item 3 of argv) as integer
+    set reqHeight to (item 4 of argv) as integer
+
+    tell application "System Events"
+        tell process "Pd"
+            repeat with w in (every window)
+                set winTitle to name of w
+                if winTitle starts with (fileName & " ") and winTitle ends with patchDir then
+                    if reqWidth > 0 then
+                        -- Resize window to fit content
+                        set size of w to {reqWidth, reqHeight}
+                        delay 0.3
+                    end if
+
+                    -- Patches are opened in the background; raise the
+                    -- window only now, right before it is captured
+                    perform action "AXRaise" of w
+                    set frontmost to true
+                    delay 0.2
+
+                    -- Get window bounds after resize
+                    set windowBounds to position of w & size of w
+                    set AppleScript's text item delimiters to ","
+                    return (windowBounds as text) & "|" & winTitle
+                end if
+            end repeat
+        end tell
+    end tell
+    return "not found"
+end run
+'''
+
+# Close the first window of the Pd application.
+# argv: pd_app
+CLOSE_WINDOW_SCRIPT = '''
+on run argv
+    tell application (item 1 of argv)
+        close window 1
+    end tell
+    return "ok"
+end run
+'''
+
+# Close a patch window by its title using its close button, so the right
+# window is closed even when other patches are opening meanwhile.
+# argv: file_name, patch_dir
+CLOSE_PATCH_WINDOW_SCRIPT = '''
+on run argv
+    set fileName to item 1 of argv
+    set patchDir to item 2 of argv
+
+    tell application "System Events"
+        tell process "Pd"
+            repeat with w in (every window)
+                set winTitle to name of w
+                if winTitle starts with (fileName & " ") and winTitle ends with patchDir then
+                    click (first button of w whose subrole is "AXCloseButton")
+                    return "ok"
+                end if
+            end repeat
+        end tell
+    end tell
+    return "not found"
+end run
+'''
+
+
+@lru_cache(maxsize=None)
+def _compiled_script(source: str) -> Optional[str]:
+    """
+    Compile an AppleScript with osacompile and return the .scpt path.
+
+    The compiled script is reused across calls and processes. Returns None
+    if compilation fails, in which case the source is run directly.
+    """
+    digest = hashlib.sha1(source.encode()).hexdigest()[:16]
+    scpt_path = SCRIPT_CACHE_DIR / f"{digest}.scpt"
+    if scpt_path.exists():
+        return str(scpt_path)
+
+    try:
+        SCRIPT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = scpt_path.with_suffix(f".{os.getpid()}.tmp.scpt")
+        result = subprocess.run(
+            ["osacompile", "-o", str(tmp_path), "-e", source],
+            capture_output=True, text=True, timeout=10
+        )
+        if result.returncode != 0:
+            return None
+        os.replace(tmp_path, scpt_path)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    return str(scpt_path)
+
+
+# Shared interactive osascript process (see _osa_session)
+_osa_proc: Optional[subprocess.Popen] = None
+_osa_disabled = False
+_osa_calls = 0
+
+
+def _osa_quote(value: str) -> str:
+    """Quote a string as an AppleScript string literal."""
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'"{escaped}"'
+
+
+def _osa_exchange(proc: subprocess.Popen, expr: str,
+                  timeout: Optional[float]) -> Tuple[bool, str]:
+    """
+    Evaluate one AppleScript expression in an interactive osascript.
+
+    The expression's result is prefixed with a begin marker, and a separate
+    end marker line is evaluated afterwards so we know where the output
+    stops even if the expression fails. Both markers are built by
+    concatenation so that echoed input lines can never match them.
+
+    Returns (succeeded, result text or error output).
+    """
+    global _osa_calls
+    _osa_calls += 1
+    begin = f"__pd_vibe_beg_{_osa_calls}__"
+    end = f"__pd_vibe_end_{_osa_calls}__".encode()
+
+    proc.stdin.write((
+        f'"__pd_vibe_" & "beg_{_osa_calls}__" & ({expr})\n'
+        f'"__pd_vibe_" & "end_{_osa_calls}__"\n'
+    ).encode())
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    fd = proc.stdout.fileno()
+    output = b""
+    while end not in output:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        ready, _, _ = select.select([fd], [], [], remaining)
+        if not ready:
+            raise subprocess.TimeoutExpired(["osascript", "-i"], timeout)
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            raise EOFError("osascript session closed")
+        output += chunk
+
+    text = output[:output.index(end)].decode(errors="replace")
+    if begin not in text:
+        return (False, text)
+    result = text[text.index(begin) + len(begin):].split("\n", 1)[0]
+    return (True, result.rstrip().rstrip('"'))
+
+
+def _close_osa_session():
+    """Terminate the shared osascript process."""
+    global _osa_proc
+    if _osa_proc is None:
+        return
+    try:
+        _osa_proc.stdin.close()
+        _osa_proc.wait(timeout=2)
+    except (OSError, subprocess.TimeoutExpired):
+        _osa_proc.kill()
+    _osa_proc = None
+
+
+atexit.register(_close_osa_session)
+
+
+def _osa_session() -> Optional[subprocess.Popen]:
+    """
+    Return the shared ``osascript -i`` process, starting it on first use.
+
+    Keeping one process alive avoids forking osascript for every script run
+    in a batch. Returns None (and stops trying) if the session cannot be
+    started or does not answer.
+    """
+    global _osa_proc, _osa_disabled
+    if _osa_disabled:
+        return None
+    if _osa_proc is not None and _osa_proc.poll() is None:
+        return _osa_proc
+
+    try:
+        _osa_proc = subprocess.Popen(
+            ["osascript", "-i"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, bufsize=0,
+        )
+        _osa_exchange(_osa_proc, '""', timeout=5)
+    except (OSError, EOFError, subprocess.TimeoutExpired):
+        _close_osa_session()
+        _osa_disabled = True
+
+    return _osa_proc
+
+
+def _run_script(source: str, *args, timeout: Optional[float] = None
+                ) -> subprocess.CompletedProcess:
+    """Run one of the AppleScripts above, passing args to its run handler."""
+    scpt_path = _compiled_script(source)
+    args = [str(a) for a in args]
+
+    proc = _osa_session()
+    if proc is not None:
+        script = f"(POSIX file {_osa_quote(scpt_path)})" if scpt_path else _osa_quote(source)
+        params = ", ".join(_osa_quote(a) for a in args)
+        try:
+            ok, output = _osa_exchange(
+                proc, f"run script {script} with parameters {{{params}}}", timeout
+            )
+        except subprocess.TimeoutExpired:
+            # The session is still busy with the script; start over next time
+            _close_osa_session()
+            raise
+        except (OSError, EOFError):
+            _close_osa_session()
+        else:
+            if ok:
+                return subprocess.CompletedProcess(args, 0, output, "")
+            return subprocess.CompletedProcess(args, 1, "", output)
+
+    script = [scpt_path] if scpt_path else ["-e", source]
+    result = subprocess.run(
+        ["osascript", *script, *args],
+        capture_output=True, text=True, timeout=timeout
+    )
+    # osascript ends its output with a newline; the session path does not
+    result.stdout = result.stdout.rstrip("\n")
+    return result
+
+
+@lru_cache(maxsize=None)
 def find_pd_app() -> Optional[str]:
-    """Find Pure Data application on macOS."""
+    """Find Pure Data application on macOS (cached for the process)."""
     candidates = [
         "/Applications/Pd-0.55-2.app",
         "/Applications/Pd-0.55-1.app",
@@ -28,7 +332,13 @@ def find_pd_app() -> Optional[str]:
         if os.path.exists(path):
             return path
 
-    # Try to find any Pd app
+    # Try to find any Pd app by its bundle identifier
+    if HAS_PYOBJC:
+        url = NSWorkspace.sharedWorkspace().URLForApplicationWithBundleIdentifier_(
+            "org.puredata.pd"
+        )
+        return str(url.path()) if url else None
+
     result = subprocess.run(
         ["mdfind", "kMDItemCFBundleIdentifier == 'org.puredata.pd'"],
         capture_output=True, text=True
@@ -39,6 +349,133 @@ def find_pd_app() -> Optional[str]:
     return None
 
 
+def _resolve_patch(pd_path: str) -> Path:
+    """Resolve a patch path, raising if the patch does not exist."""
+    pd_path = Path(pd_path)
+    # resolve() stats every path component; absolute paths without ".."
+    # are already usable as-is (batch callers usually pass these)
+    if not pd_path.is_absolute() or ".." in pd_path.parts:
+        pd_path = pd_path.resolve()
+    if not pd_path.exists():
+        raise FileNotFoundError(f"Patch not found: {pd_path}")
+    return pd_path
+
+
+def _output_path(pd_path: Path, output_path: Optional[str]) -> Path:
+    """Get the screenshot path (default: <patch>.pd.png next to the patch)."""
+    if output_path is None:
+        return pd_path.parent / f"{pd_path.name}.png"
+    return Path(output_path)
+
+
+def _require_pd_app(pd_app: Optional[str] = None) -> str:
+    """Return pd_app, or the auto-detected Pd application."""
+    if pd_app is None:
+        pd_app = find_pd_app()
+        if pd_app is None:
+            raise RuntimeError("Could not find Pure Data application")
+    return pd_app
+
+
+def _parse_rect(text: str) -> Optional[Tuple[int, int, int, int]]:
+    """Parse an "x,y,w,h" rectangle as returned by the AppleScript helpers."""
+    nums = re.findall(r'-?\d+', text)
+    if len(nums) != 4:
+        return None
+    x, y, w, h = (int(n) for n in nums)
+    return (x, y, w, h)
+
+
+def _find_pd_window_id(rect: Tuple[int, int, int, int],
+                       title: Optional[str] = None) -> Optional[int]:
+    """
+    Find the on-screen Pd window occupying rect (requires PyObjC).
+
+    Pd opens windows at the geometry saved in the patch, so several patches
+    can share a rect; when the window title is given, the window is picked
+    by title alone.
+    """
+    windows = Quartz.CGWindowListCopyWindowInfo(
+        Quartz.kCGWindowListOptionOnScreenOnly, Quartz.kCGNullWindowID
+    )
+    for info in windows or ():
+        if info.get(Quartz.kCGWindowOwnerName) != "Pd":
+            continue
+        if title is not None:
+            if info.get(Quartz.kCGWindowName) == title:
+                return int(info[Quartz.kCGWindowNumber])
+            continue
+        b = info.get(Quartz.kCGWindowBounds) or {}
+        bounds = tuple(round(b.get(k, -1)) for k in ("X", "Y", "Width", "Height"))
+        if bounds == rect:
+            return int(info[Quartz.kCGWindowNumber])
+    return None
+
+
+def _capture_window_rect(rect: Tuple[int, int, int, int],
+                         title: Optional[str] = None) -> bytes:
+    """
+    Capture a screen rectangle and return it as PNG bytes.
+
+    Uses CGWindowListCreateImage + NSBitmapImageRep when PyObjC is available,
+    otherwise falls back to screencapture through a temporary file
+    (screencapture has no option to write the image to stdout). With PyObjC,
+    only the Pd window at rect (with the given title, if any) is captured,
+    so windows opening on top of it do not end up in the image.
+    """
+    x, y, w, h = rect
+
+    if HAS_PYOBJC:
+        window_id = _find_pd_window_id(rect, title)
+        if window_id is not None:
+            options = Quartz.kCGWindowListOptionIncludingWindow
+        else:
+            options, window_id = Quartz.kCGWindowListOptionOnScreenOnly, Quartz.kCGNullWindowID
+        image = Quartz.CGWindowListCreateImage(
+            Quartz.CGRectMake(x, y, w, h),
+            options,
+            window_id,
+            Quartz.kCGWindowImageDefault,
+        )
+        if image is None:
+            raise RuntimeError("CGWindowListCreateImage returned no image")
+        rep = NSBitmapImageRep.alloc().initWithCGImage_(image)
+        data = rep.representationUsingType_properties_(NSPNGFileType, None)
+        return bytes(data)
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        _screencapture(rect, Path(tmp_path))
+        return Path(tmp_path).read_bytes()
+    finally:
+        os.unlink(tmp_path)
+
+
+def _screencapture(rect: Tuple[int, int, int, int], output_path: Path):
+    """Capture a screen rectangle to a PNG file with screencapture."""
+    x, y, w, h = rect
+    subprocess.run(
+        ["screencapture", "-x", f"-R{x},{y},{w},{h}", "-t", "png", str(output_path)],
+        capture_output=True, timeout=10, check=True
+    )
+
+
+def _save_window_rect(output_path: Path, rect: Tuple[int, int, int, int],
+                      title: Optional[str] = None) -> str:
+    """
+    Capture a screen rectangle (see _capture_window_rect) into output_path.
+
+    Without PyObjC, screencapture writes the file directly rather than
+    going through a temporary file. Returns the path as a string.
+    """
+    if HAS_PYOBJC:
+        output_path.write_bytes(_capture_window_rect(rect, title))
+    else:
+        _screencapture(rect, output_path)
+    return str(output_path)
+
+
 def screenshot_patch(
     pd_path: str,
     output_path: Optional[str] = None,
@@ -57,71 +494,34 @@ def screenshot_patch(
     Returns:
         Path to the screenshot, or None if failed
     """
-    pd_path = Path(pd_path).resolve()
-
-    if not pd_path.exists():
-        raise FileNotFoundError(f"Patch not found: {pd_path}")
-
-    if output_path is None:
-        output_path = pd_path.parent / f"{pd_path.name}.png"
-    else:
-        output_path = Path(output_path)
+    pd_path = _resolve_patch(pd_path)
+    output_path = _output_path(pd_path, output_path)
 
     # Find Pd
-    if pd_app is None:
-        pd_app = find_pd_app()
-        if pd_app is None:
-            raise RuntimeError("Could not find Pure Data application")
-
-    # AppleScript to open patch, screenshot, and close
-    applescript = f'''
-    tell application "{pd_app}"
-        activate
-        open POSIX file "{pd_path}"
-    end tell
-
-    delay {wait_time}
-
-    -- Find the patch window (should be frontmost)
-    tell application "System Events"
-        tell process "Pd"
-            set frontWindow to window 1
-            set windowBounds to position of frontWindow & size of frontWindow
-        end tell
-    end tell
-
-    -- Calculate screenshot bounds
-    set x1 to item 1 of windowBounds
-    set y1 to item 2 of windowBounds
-    set w to item 3 of windowBounds
-    set h to item 4 of windowBounds
-
-    -- Take screenshot using screencapture
-    do shell script "screencapture -R" & x1 & "," & y1 & "," & w & "," & h & " \\"{output_path}\\""
-
-    -- Close the patch window
-    tell application "{pd_app}"
-        close window 1
-    end tell
-
-    return "{output_path}"
-    '''
+    pd_app = _require_pd_app(pd_app)
 
     try:
-        result = subprocess.run(
-            ["osascript", "-e", applescript],
-            capture_output=True, text=True, timeout=30
+        # Open patch and report the window rectangle
+        result = _run_script(
+            OPEN_FRONT_WINDOW_SCRIPT, pd_app, pd_path, int(wait_time * 1000),
+            timeout=30
         )
 
         if result.returncode != 0:
             print(f"AppleScript error: {result.stderr}")
             return None
 
-        if output_path.exists():
-            return str(output_path)
-        else:
+        rect = _parse_rect(result.stdout)
+        if rect is None:
+            print(f"Could not read window bounds: {result.stdout}")
             return None
 
+        try:
+            return _save_window_rect(output_path, rect)
+        finally:
+            # Close the patch window
+            _run_script(CLOSE_WINDOW_SCRIPT, pd_app)
+
     except subprocess.TimeoutExpired:
         print("Screenshot timed out")
         return None
@@ -136,61 +536,30 @@ def screenshot_patch_simple(
     wait_time: float = 2.0,
 ) -> Optional[str]:
     """
-    Simpler screenshot approach using screencapture with window selection.
+    Simpler screenshot approach capturing Pd's frontmost window.
 
-    This opens the patch and uses screencapture's window capture mode.
+    This opens the patch and captures the rectangle of Pd's first window.
     """
-    pd_path = Path(pd_path).resolve()
-
-    if not pd_path.exists():
-        raise FileNotFoundError(f"Patch not found: {pd_path}")
-
-    if output_path is None:
-        output_path = pd_path.parent / f"{pd_path.name}.png"
-    else:
-        output_path = Path(output_path)
-
-    pd_app = find_pd_app()
-    if pd_app is None:
-        raise RuntimeError("Could not find Pure Data application")
+    pd_path = _resolve_patch(pd_path)
+    output_path = _output_path(pd_path, output_path)
+    pd_app = _require_pd_app()
 
-    # Open the patch
-    subprocess.run(["open", "-a", pd_app, str(pd_path)])
+    # Open the patch in the background (without activating Pd)
+    subprocess.run(["open", "-g", "-a", pd_app, str(pd_path)])
 
     # Wait for window to open
     time.sleep(wait_time)
 
-    # Use screencapture to capture the frontmost window
-    # -l requires window ID, -w is interactive - let's use a different approach
-
-    # Get the window ID using AppleScript
-    get_window_script = '''
-    tell application "System Events"
-        tell process "Pd"
-            set frontWindow to window 1
-            return id of frontWindow
-        end tell
-    end tell
-    '''
-
     try:
-        # Take screenshot of frontmost window
-        result = subprocess.run(
-            ["screencapture", "-l", "0", "-o", str(output_path)],
-            capture_output=True, text=True, timeout=10
-        )
+        # Get the frontmost window rectangle
+        result = _run_script(FRONT_WINDOW_SCRIPT, timeout=10)
+        rect = _parse_rect(result.stdout)
 
-        # Close the window
-        close_script = f'''
-        tell application "{pd_app}"
-            close window 1
-        end tell
-        '''
-        subprocess.run(["osascript", "-e", close_script], capture_output=True)
-
-        if output_path.exists():
-            return str(output_path)
-        return None
+        try:
+            return _save_window_rect(output_path, rect) if rect else None
+        finally:
+            # Close the window
+            _run_script(CLOSE_WINDOW_SCRIPT, pd_app)
 
     except Exception as e:
         print(f"Screenshot error: {e}")
@@ -208,14 +577,9 @@ def screenshot_with_screencapture(
     Note: This requires user interaction to click on the window.
     For fully automated screenshots, use screenshot_patch().
     """
-    pd_path = Path(pd_path).resolve()
-
-    if output_path is None:
-        output_path = pd_path.parent / f"{pd_path.name}.png"
-
-    pd_app = find_pd_app()
-    if pd_app is None:
-        raise RuntimeError("Could not find Pure Data application")
+    pd_path = _resolve_patch(pd_path)
+    output_path = _output_path(pd_path, output_path)
+    pd_app = _require_pd_app()
 
     # Open the patch
     subprocess.run(["open", "-a", pd_app, str(pd_path)])
@@ -224,13 +588,26 @@ def screenshot_with_screencapture(
     print(f"Click on the Pd patch window to capture it...")
 
     # Interactive window capture
-    subprocess.run(["screencapture", "-w", "-o", str(output_path)])
+    subprocess.run(["screencapture", "-x", "-w", "-o", "-t", "png", str(output_path)])
 
-    if Path(output_path).exists():
+    if output_path.exists():
         return str(output_path)
     return None
 
 
+# Positioned boxes, e.g. "#X obj x y text...", "#X floatatom x y ..."
+_BOX_RE = re.compile(
+    rb'^#X (obj|msg|text|floatatom|symbolatom)[ \t]+(-?\d+)[ \t]+(-?\d+)(?!\S)([^\n]*)',
+    re.MULTILINE,
+)
+
+# Fixed (width, height) estimates for atom boxes
+_ATOM_SIZES = {
+    b'floatatom': (80, 25),
+    b'symbolatom': (80, 25),
+}
+
+
 def get_patch_bounds(pd_path: str) -> tuple[int, int, int, int]:
     """
     Calculate bounding box of all objects in a patch.
@@ -240,41 +617,27 @@ def get_patch_bounds(pd_path: str) -> tuple[int, int, int, int]:
     min_x, min_y = float('inf'), float('inf')
     max_x, max_y = 0, 0
 
-    with open(pd_path, 'r') as f:
-        for line in f:
-            # Parse object/message/text positions
-            # Format: #X obj x y ... or #X msg x y ... or #X text x y ...
-            if line.startswith('#X obj ') or line.startswith('#X msg ') or line.startswith('#X text '):
-                parts = line.split()
-                if len(parts) >= 4:
-                    try:
-                        x = int(parts[2])
-                        y = int(parts[3])
-                        min_x = min(min_x, x)
-                        min_y = min(min_y, y)
-                        # Estimate object width (rough: 100px for objects, more for long names)
-                        obj_width = 100
-                        if len(parts) > 4:
-                            # Estimate based on object name + args
-                            text_len = sum(len(str(p)) for p in parts[4:])
-                            obj_width = max(100, text_len * 8)
-                        max_x = max(max_x, x + obj_width)
-                        max_y = max(max_y, y + 30)  # ~30px height per object
-                    except (ValueError, IndexError):
-                        pass
-            # Also check floatatom, symbolatom, etc.
-            elif line.startswith('#X floatatom ') or line.startswith('#X symbolatom '):
-                parts = line.split()
-                if len(parts) >= 4:
-                    try:
-                        x = int(parts[2])
-                        y = int(parts[3])
-                        min_x = min(min_x, x)
-                        min_y = min(min_y, y)
-                        max_x = max(max_x, x + 80)
-                        max_y = max(max_y, y + 25)
-                    except (ValueError, IndexError):
-                        pass
+    with open(pd_path, 'rb') as f:
+        # Scan raw bytes through a read-only mapping; the tokens we look
+        # for are ASCII so there is no need to decode the whole file.
+        if os.fstat(f.fileno()).st_size == 0:
+            return (0, 0, 600, 400)  # Default size
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for m in _BOX_RE.finditer(mm):
+                kind, x, y, rest = m.groups()
+                x, y = int(x), int(y)
+                size = _ATOM_SIZES.get(kind)
+                if size is None:
+                    # Estimate object width from its text (rough: 100px minimum);
+                    # only this tail is decoded, so non-ASCII text counts
+                    # characters rather than UTF-8 bytes
+                    text_len = sum(len(p) for p in rest.decode('utf-8', 'replace').split())
+                    size = (max(100, text_len * 8), 30)  # ~30px height per object
+                min_x = min(min_x, x)
+                min_y = min(min_y, y)
+                max_x = max(max_x, x + size[0])
+                max_y = max(max_y, y + size[1])
 
     # Add padding
     padding = 50
@@ -289,105 +652,172 @@ def get_patch_bounds(pd_path: str) -> tuple[int, int, int, int]:
     )
 
 
-def screenshot_patch_v2(
+def _open_patch(pd_path: Path, pd_app: str, wait_time: float):
+    """Open a patch in Pd without activating it and wait for its window."""
+    subprocess.run(["open", "-g", "-a", pd_app, str(pd_path)])
+    time.sleep(wait_time)
+
+
+def _capture_open_patch(
+    pd_path: Path,
+    resize_to_content: bool = False,
+    capture: Callable[..., T] = _capture_window_rect,
+) -> Optional[T]:
+    """
+    Capture an already open patch window by its title, then close it.
+
+    capture(rect, title) takes the image; the default returns PNG bytes,
+    partial(_save_window_rect, path) writes it to path instead.
+    """
+    # Pd titles windows "<file> - <dir>"; matching both parts (rather than a
+    # substring of the name) keeps e.g. voice.pd and osc-voice.pd apart
+    window_key = (pd_path.name, str(pd_path.parent))
+
+    req_width, req_height = 0, 0  # Keep the window's own size
+    if resize_to_content:
+        # Calculate required window size from patch content
+        bounds = get_patch_bounds(str(pd_path))
+        req_width = bounds[2] - bounds[0] + 50  # Add some margin
+        req_height = bounds[3] - bounds[1] + 80  # Add title bar + margin
+
+        # Minimum sizes
+        req_width = max(req_width, 400)
+        req_height = max(req_height, 300)
+
+        # Maximum sizes (screen limits)
+        req_width = min(req_width, 1800)
+        req_height = min(req_height, 1200)
+
+    try:
+        # Find the window by title and report its rectangle and full title
+        result = _run_script(
+            FIND_WINDOW_SCRIPT, *window_key, req_width, req_height, timeout=15
+        )
+        rect_text, _, title = result.stdout.partition("|")
+        rect = _parse_rect(rect_text)
+
+        try:
+            if rect is not None:
+                return capture(rect, title.strip() or None)
+        finally:
+            # Close the patch window
+            _run_script(CLOSE_PATCH_WINDOW_SCRIPT, *window_key, timeout=5)
+
+        print(f"Result: {result.stdout} {result.stderr}")
+        return None
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def screenshot_patch_bytes(
     pd_path: str,
-    output_path: Optional[str] = None,
     wait_time: float = 2.0,
-) -> Optional[str]:
+    resize_to_content: bool = False,
+) -> Optional[bytes]:
     """
-    Screenshot using window name matching.
+    Screenshot a patch and return the PNG data without writing it to disk.
 
-    Opens patch, finds window by name, resizes to fit content, screenshots it.
-    """
-    pd_path = Path(pd_path).resolve()
+    Opens patch, finds window by name and captures it.
 
-    if not pd_path.exists():
-        raise FileNotFoundError(f"Patch not found: {pd_path}")
+    Args:
+        pd_path: Path to the .pd file
+        wait_time: Seconds to wait for Pd to open the patch
+        resize_to_content: Resize the window to the patch's object bounds
+            first (scans the patch file); otherwise keep the saved size
 
-    if output_path is None:
-        output_path = pd_path.parent / f"{pd_path.name}.png"
-    else:
-        output_path = Path(output_path)
+    Returns:
+        PNG bytes, or None if failed
+    """
+    pd_path = _resolve_patch(pd_path)
+    pd_app = _require_pd_app()
 
-    pd_app = find_pd_app()
-    if pd_app is None:
-        raise RuntimeError("Could not find Pure Data application")
+    _open_patch(pd_path, pd_app, wait_time)
+    return _capture_open_patch(pd_path, resize_to_content)
 
-    patch_name = pd_path.stem
 
-    # Calculate required window size from patch content
-    bounds = get_patch_bounds(str(pd_path))
-    req_width = bounds[2] - bounds[0] + 50  # Add some margin
-    req_height = bounds[3] - bounds[1] + 80  # Add title bar + margin
+def screenshot_patch_v2(
+    pd_path: str,
+    output_path: Optional[str] = None,
+    wait_time: float = 2.0,
+    resize_to_content: bool = False,
+) -> Optional[str]:
+    """
+    Screenshot using window name matching.
 
-    # Minimum sizes
-    req_width = max(req_width, 400)
-    req_height = max(req_height, 300)
+    Opens patch, finds window by name, optionally resizes it to fit content,
+    screenshots it. See screenshot_patch_bytes() to get the PNG data without
+    writing a file.
+    """
+    pd_path = _resolve_patch(pd_path)
+    output_path = _output_path(pd_path, output_path)
+    pd_app = _require_pd_app()
 
-    # Maximum sizes (screen limits)
-    req_width = min(req_width, 1800)
-    req_height = min(req_height, 1200)
+    _open_patch(pd_path, pd_app, wait_time)
+    return _capture_open_patch(
+        pd_path, resize_to_content, partial(_save_window_rect, output_path)
+    )
 
-    # Open the patch
-    subprocess.run(["open", "-a", pd_app, str(pd_path)])
-    time.sleep(wait_time)
 
-    # Get window ID by name using CGWindowListCopyWindowInfo
-    applescript = f'''
-    tell application "System Events"
-        tell process "Pd"
-            set allWindows to every window
-            repeat with w in allWindows
-                if name of w contains "{patch_name}" then
-                    -- Resize window to fit content
-                    set size of w to {{{req_width}, {req_height}}}
-                    delay 0.3
+def screenshot_patches_pipelined(
+    pd_paths: List[str],
+    output_dir: Optional[str] = None,
+    wait_time: float = 2.0,
+    resize_to_content: bool = False,
+) -> List[Optional[str]]:
+    """
+    Screenshot several patches, opening the next one while capturing.
 
-                    -- Get window bounds after resize
-                    set pos to position of w
-                    set sz to size of w
-                    set x to item 1 of pos
-                    set y to item 2 of pos
-                    set width to item 1 of sz
-                    set height to item 2 of sz
+    A worker thread opens patch N+1 (and waits for its window) while the
+    current patch is captured and closed, so a batch costs roughly
+    max(wait_time, capture time) per patch instead of their sum. Windows are
+    matched by their exact title, so patches sharing a saved window geometry
+    or a name prefix do not get mixed up. Without PyObjC captures are plain
+    screen rectangles, so the next patch is only opened once the current one
+    has been captured; the same happens when a patch repeats (Pd would just
+    raise its window).
 
-                    -- Take screenshot
-                    do shell script "screencapture -R" & x & "," & y & "," & width & "," & height & " \\"{output_path}\\""
+    Args:
+        pd_paths: Paths to the .pd files
+        output_dir: Directory for the screenshots (default: next to each patch)
+        wait_time: Seconds to wait for Pd to open each patch
+        resize_to_content: See screenshot_patch_bytes()
 
-                    return "ok"
-                end if
-            end repeat
-        end tell
-    end tell
-    return "not found"
-    '''
+    Returns:
+        Screenshot paths in input order (None for failed captures)
+    """
+    patches = [_resolve_patch(p) for p in pd_paths]
+    if not patches:
+        return []
+    pd_app = _require_pd_app()
 
-    try:
-        result = subprocess.run(
-            ["osascript", "-e", applescript],
-            capture_output=True, text=True, timeout=15
-        )
+    results: List[Optional[str]] = []
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        opening = pool.submit(_open_patch, patches[0], pd_app, wait_time)
 
-        # Close the patch window using keyboard shortcut
-        close_script = '''
-        tell application "System Events"
-            tell process "Pd"
-                keystroke "w" using command down
-            end tell
-        end tell
-        '''
-        subprocess.run(["osascript", "-e", close_script], capture_output=True, timeout=5)
+        for i, pd_path in enumerate(patches):
+            opening.result()
+            next_patch = patches[i + 1] if i + 1 < len(patches) else None
+            open_early = HAS_PYOBJC and next_patch != pd_path
 
-        if "ok" in result.stdout:
-            if output_path.exists():
-                return str(output_path)
+            # The current window is found by its exact title and captured
+            # by its own window id, so the next patch may open on top of it
+            if next_patch is not None and open_early:
+                opening = pool.submit(_open_patch, next_patch, pd_app, wait_time)
 
-        print(f"Result: {result.stdout} {result.stderr}")
-        return None
+            if output_dir is None:
+                output_path = _output_path(pd_path, None)
+            else:
+                output_path = Path(output_dir) / f"{pd_path.name}.png"
+            results.append(_capture_open_patch(
+                pd_path, resize_to_content, partial(_save_window_rect, output_path)
+            ))
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
+            if next_patch is not None and not open_early:
+                opening = pool.submit(_open_patch, next_patch, pd_app, wait_time)
+
+    return results
 
 
 if __name__ == "__main__":
@@ -399,7 +829,7 @@ if __name__ == "__main__":
     pd_file = sys.argv[1]
     output = sys.argv[2] if len(sys.argv) > 2 else None
 
-    result = screenshot_patch_v2(pd_file, output)
+    result = screenshot_patch_v2(pd_file, output, resize_to_content=True)
     if result:
         print(f"Screenshot saved to: {result}")
     else:
@@ -6,14 +6,14 @@ and how to silence them. Useful for debugging audio bleed issues.
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from collections import defaultdict
+from itertools import chain
 
 from .core import IRPatch, IRNode, IREdge, Domain, EdgeKind
-from .analysis import GraphAnalyzer
 
 
-@dataclass
+@dataclass(slots=True)
 class DelayBuffer:
     """A delay buffer (delwrite~) and its readers."""
     name: str
@@ -23,7 +23,7 @@ class DelayBuffer:
     feedback_multiplier: Optional[Tuple[str, str]] = None  # (node_id, value)
 
 
-@dataclass
+@dataclass(slots=True)
 class FeedbackLoop:
     """A feedback loop with gain information."""
     nodes: List[str]
@@ -32,7 +32,7 @@ class FeedbackLoop:
     delay_name: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TableBuffer:
     """A table/array that stores samples."""
     name: str
@@ -40,7 +40,7 @@ class TableBuffer:
     size: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class StateAnalysis:
     """Complete state analysis of a patch."""
     delay_buffers: List[DelayBuffer]
@@ -49,76 +49,64 @@ class StateAnalysis:
 
     def to_text(self) -> str:
         """Generate human-readable state report."""
-        lines = []
-
         if not self.delay_buffers and not self.feedback_loops and not self.tables:
             return "No stateful elements found (stateless patch)."
 
-        lines.append("# Stateful Elements")
-        lines.append("")
+        lines = ["# Stateful Elements", ""]
+        out = lines.append
+
+        # Silence steps are collected while the sections are written,
+        # then numbered once at the end
+        loop_kills = []
+        buffer_kills = []
+        clears = []
 
         if self.delay_buffers:
-            lines.append("## Delay Buffers")
+            out("## Delay Buffers")
             for buf in self.delay_buffers:
                 readers = ", ".join(f"{t}ms" for _, t in buf.reader_nodes) if buf.reader_nodes else "none"
-                lines.append(f"- **{buf.name}** ({buf.size_ms}ms)")
-                lines.append(f"  - Writer: `{buf.writer_node}`")
-                lines.append(f"  - Read taps: {readers}")
+                clear = f"`; {buf.name} const 0`"
+                out(f"- **{buf.name}** ({buf.size_ms}ms)")
+                out(f"  - Writer: `{buf.writer_node}`")
+                out(f"  - Read taps: {readers}")
                 if buf.feedback_multiplier:
                     node, val = buf.feedback_multiplier
-                    lines.append(f"  - Feedback: `{node}` (gain: {val})")
-                    lines.append(f"  - **To silence:** Set `{node}` to 0, then `; {buf.name} const 0`")
+                    out(f"  - Feedback: `{node}` (gain: {val})")
+                    out(f"  - **To silence:** Set `{node}` to 0, then {clear}")
+                    buffer_kills.append(f"Set `{node}` to 0 (kill {buf.name} feedback)")
                 else:
-                    lines.append(f"  - **To clear:** `; {buf.name} const 0`")
-            lines.append("")
+                    out(f"  - **To clear:** {clear}")
+                clears.append(clear)
+            out("")
 
         if self.feedback_loops:
-            lines.append("## Feedback Loops")
+            out("## Feedback Loops")
             for loop in self.feedback_loops:
-                nodes_str = " → ".join(loop.nodes)
-                lines.append(f"- {nodes_str}")
+                out("- " + " → ".join(loop.nodes))
                 if loop.gain_node:
-                    lines.append(f"  - Gain control: `{loop.gain_node}` = {loop.gain_value or '?'}")
-                    lines.append(f"  - **To kill:** Set `{loop.gain_node}` to 0")
-            lines.append("")
+                    out(f"  - Gain control: `{loop.gain_node}` = {loop.gain_value or '?'}")
+                    out(f"  - **To kill:** Set `{loop.gain_node}` to 0")
+                    loop_kills.append(f"Set `{loop.gain_node}` to 0 (kill feedback)")
+            out("")
 
         if self.tables:
-            lines.append("## Tables/Arrays")
+            out("## Tables/Arrays")
             for tbl in self.tables:
                 size_str = f" ({tbl.size} samples)" if tbl.size else ""
-                lines.append(f"- **{tbl.name}**{size_str}")
-                lines.append(f"  - **To clear:** `; {tbl.name} const 0`")
-            lines.append("")
-
-        # Summary
-        lines.append("## Silence Sequence")
-        lines.append("To fully silence this patch:")
-        step = 1
-
-        # First kill feedback
-        for loop in self.feedback_loops:
-            if loop.gain_node:
-                lines.append(f"{step}. Set `{loop.gain_node}` to 0 (kill feedback)")
-                step += 1
-
-        for buf in self.delay_buffers:
-            if buf.feedback_multiplier:
-                node, _ = buf.feedback_multiplier
-                lines.append(f"{step}. Set `{node}` to 0 (kill {buf.name} feedback)")
-                step += 1
-
-        if step > 1:
-            lines.append(f"{step}. Wait ~10ms for buffers to drain")
-            step += 1
-
-        # Then clear buffers
-        for buf in self.delay_buffers:
-            lines.append(f"{step}. `; {buf.name} const 0`")
-            step += 1
-
-        for tbl in self.tables:
-            lines.append(f"{step}. `; {tbl.name} const 0`")
-            step += 1
+                clear = f"`; {tbl.name} const 0`"
+                out(f"- **{tbl.name}**{size_str}")
+                out(f"  - **To clear:** {clear}")
+                clears.append(clear)
+            out("")
+
+        # Summary: kill feedback first, let buffers drain, then clear them
+        out("## Silence Sequence")
+        out("To fully silence this patch:")
+        steps = loop_kills + buffer_kills
+        if steps:
+            steps.append("Wait ~10ms for buffers to drain")
+        steps += clears
+        lines.extend(f"{i}. {step}" for i, step in enumerate(steps, 1))
 
         return "\n".join(lines)
 
@@ -128,9 +116,24 @@ class StateAnalyzer:
 
     def __init__(self, ir_patch: IRPatch):
         self.ir = ir_patch
-        self._analyzer = GraphAnalyzer(ir_patch)
         self._node_map: Dict[str, IRNode] = {n.id: n for n in ir_patch.nodes}
 
+        # Wire predecessors, built once and shared by every delay writer
+        self._preds: Dict[str, List[str]] = defaultdict(list)
+        for edge in ir_patch.edges:
+            if edge.kind == EdgeKind.WIRE:
+                self._preds[edge.to_endpoint.node].append(edge.from_endpoint.node)
+
+        # Nodes bucketed by type in one pass; each finder reads its buckets
+        self._by_type: Dict[str, List[IRNode]] = defaultdict(list)
+        for node in ir_patch.nodes:
+            self._by_type[node.type].append(node)
+
+    def _nodes_of(self, *types: str) -> Iterator[IRNode]:
+        """Iterate the nodes of the given types, bucket by bucket."""
+        by_type = self._by_type
+        return chain.from_iterable(by_type.get(t, ()) for t in types)
+
     def analyze(self) -> StateAnalysis:
         """Perform complete state analysis."""
         delay_buffers = self._find_delay_buffers()
@@ -145,96 +148,85 @@ class StateAnalyzer:
 
     def _find_delay_buffers(self) -> List[DelayBuffer]:
         """Find all delay buffers and their properties."""
-        buffers = []
-
-        # Find delwrite~ nodes
-        writers: Dict[str, Tuple[str, str]] = {}  # name -> (node_id, size)
-        for node in self.ir.nodes:
-            if node.type == 'delwrite~' and node.args:
-                name = str(node.args[0])
-                size = str(node.args[1]) if len(node.args) > 1 else "?"
-                writers[name] = (node.id, size)
-
-        # Find corresponding readers
-        readers: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
-        for node in self.ir.nodes:
-            if node.type in ('delread~', 'delread4~', 'vd~') and node.args:
-                name = str(node.args[0])
-                time = str(node.args[1]) if len(node.args) > 1 else "variable"
-                readers[name].append((node.id, time))
-
-        # Build buffer objects
-        for name, (writer_id, size) in writers.items():
-            # Look for feedback multiplier
-            feedback = self._find_feedback_multiplier(writer_id, name)
-
-            buffers.append(DelayBuffer(
-                name=name,
-                size_ms=size,
-                writer_node=writer_id,
-                reader_nodes=readers.get(name, []),
-                feedback_multiplier=feedback,
-            ))
+        # Find delwrite~ nodes (a repeated name keeps the last writer)
+        buffers_by_name: Dict[str, DelayBuffer] = {}
+        for node in self._nodes_of('delwrite~'):
+            if node.args:
+                name = node.args[0]
+                size = node.args[1] if len(node.args) > 1 else "?"
+                buffers_by_name[name] = DelayBuffer(
+                    name=name,
+                    size_ms=size,
+                    writer_node=node.id,
+                    reader_nodes=[],
+                )
+
+        # Attach corresponding readers
+        for node in self._nodes_of('delread~', 'delread4~', 'vd~'):
+            if node.args:
+                buf = buffers_by_name.get(node.args[0])
+                if buf is not None:
+                    time = node.args[1] if len(node.args) > 1 else "variable"
+                    buf.reader_nodes.append((node.id, time))
+
+        # Look for feedback multipliers
+        buffers = list(buffers_by_name.values())
+        for buf in buffers:
+            buf.feedback_multiplier = self._find_feedback_multiplier(buf.writer_node, buf.name)
 
         return buffers
 
     def _find_feedback_multiplier(self, writer_id: str, delay_name: str) -> Optional[Tuple[str, str]]:
         """Find the *~ node that controls feedback into a delay writer."""
-        # Get predecessors of the writer
-        preds = self._analyzer.get_predecessors(writer_id)
+        get_node = self._node_map.get
+        get_preds = self._preds.get
 
-        for pred_id in preds:
-            pred = self._node_map.get(pred_id)
+        # Get predecessors of the writer
+        for pred_id in get_preds(writer_id, ()):
+            pred = get_node(pred_id)
             if not pred:
                 continue
 
             # Direct *~ predecessor
             if pred.type == '*~':
-                val = str(pred.args[0]) if pred.args else "?"
+                val = pred.args[0] if pred.args else "?"
                 return (pred_id, val)
 
             # Check one level deeper
-            pred_preds = self._analyzer.get_predecessors(pred_id)
-            for pp_id in pred_preds:
-                pp = self._node_map.get(pp_id)
+            for pp_id in get_preds(pred_id, ()):
+                pp = get_node(pp_id)
                 if pp and pp.type == '*~':
-                    val = str(pp.args[0]) if pp.args else "?"
+                    val = pp.args[0] if pp.args else "?"
                     return (pp_id, val)
 
         return None
 
     def _find_feedback_loops(self) -> List[FeedbackLoop]:
         """Find feedback loops from SCC analysis."""
-        loops = []
-
         if not self.ir.analysis or not self.ir.analysis.sccs:
-            return loops
-
-        for scc in self.ir.analysis.sccs:
-            if len(scc.nodes) < 2:
-                continue
+            return []
 
-            # Find gain control node in the loop
-            gain_node = None
-            gain_value = None
-            delay_name = None
+        # Singleton SCCs are not loops; most SCCs of a near-acyclic patch are
+        multinode = [scc for scc in self.ir.analysis.sccs if len(scc.nodes) >= 2]
+        if not multinode:
+            return []
 
-            for node_id in scc.nodes:
-                node = self._node_map.get(node_id)
-                if not node:
-                    continue
+        # Gain of every *~ and buffer name of every delwrite~, so each SCC
+        # is scanned with dict probes instead of per-node type compares
+        gains = {n.id: n.args[0] if n.args else "?" for n in self._nodes_of('*~')}
+        delays = {n.id: n.args[0] for n in self._nodes_of('delwrite~') if n.args}
 
-                if node.type == '*~':
-                    gain_node = node_id
-                    gain_value = str(node.args[0]) if node.args else "?"
-                elif node.type == 'delwrite~' and node.args:
-                    delay_name = str(node.args[0])
+        loops = []
+        for scc in multinode:
+            # The last gain/delay node in the loop wins
+            gain_node = next((n for n in reversed(scc.nodes) if n in gains), None)
+            delay_node = next((n for n in reversed(scc.nodes) if n in delays), None)
 
             loops.append(FeedbackLoop(
                 nodes=list(scc.nodes),
                 gain_node=gain_node,
-                gain_value=gain_value,
-                delay_name=delay_name,
+                gain_value=gains.get(gain_node),
+                delay_name=delays.get(delay_node),
             ))
 
         return loops
@@ -242,29 +234,23 @@ class StateAnalyzer:
     def _find_tables(self) -> List[TableBuffer]:
         """Find all tables/arrays."""
         tables = []
+        existing_names: Set[str] = set()
 
-        for node in self.ir.nodes:
-            if node.type == 'table' and node.args:
-                name = str(node.args[0])
-                size = str(node.args[1]) if len(node.args) > 1 else None
-                tables.append(TableBuffer(name=name, node_id=node.id, size=size))
-            elif node.type == 'array' and node.args:
-                # Arrays defined via #X array
-                name = str(node.args[0])
-                size = str(node.args[1]) if len(node.args) > 1 else None
+        # Tables, and arrays defined via #X array
+        for node in self._nodes_of('table', 'array'):
+            if node.args:
+                name = node.args[0]
+                size = node.args[1] if len(node.args) > 1 else None
                 tables.append(TableBuffer(name=name, node_id=node.id, size=size))
-
-        # Also check for tabwrite~/tabread~ to find named tables
-        table_names: Set[str] = set()
-        for node in self.ir.nodes:
-            if node.type in ('tabwrite~', 'tabread~', 'tabread4~', 'tabplay~', 'tabosc4~'):
-                if node.args:
-                    table_names.add(str(node.args[0]))
-
-        # Add any tables we found via usage but not definition
-        existing_names = {t.name for t in tables}
-        for name in table_names - existing_names:
-            tables.append(TableBuffer(name=name, node_id="(external)", size=None))
+                existing_names.add(name)
+
+        # Add any tables we find via tabwrite~/tabread~ usage but not definition
+        for node in self._nodes_of('tabwrite~', 'tabread~', 'tabread4~', 'tabplay~', 'tabosc4~'):
+            if node.args:
+                name = node.args[0]
+                if name not in existing_names:
+                    tables.append(TableBuffer(name=name, node_id="(external)", size=None))
+                    existing_names.add(name)
 
         return tables
 
@@ -9,8 +9,15 @@ symbol table for cross-file resolution.
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Set, Any, Tuple
 from collections import defaultdict
+from itertools import product
 import json
-import re
+import sys
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ModuleNotFoundError:
+    HAS_ORJSON = False
 
 from .core import (
     IRSymbol,
@@ -25,24 +32,24 @@ from .core import (
 from .registry import get_registry
 
 
-@dataclass
+@dataclass(slots=True)
 class SymbolEndpointInfo:
     """Information about a symbol endpoint."""
     node_id: str
     patch_path: str
-    role: str  # "writer" or "reader"
     domain: Domain
     port: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GlobalSymbolEntry:
     """Entry in the global symbol table."""
     kind: SymbolKind
     resolved: str
     namespace: SymbolNamespace
     instance_local: bool
-    endpoints: List[SymbolEndpointInfo] = field(default_factory=list)
+    writers: List[SymbolEndpointInfo] = field(default_factory=list)
+    readers: List[SymbolEndpointInfo] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -50,18 +57,29 @@ class GlobalSymbolEntry:
             "resolved": self.resolved,
             "namespace": self.namespace.value,
             "instance_local": self.instance_local,
-            "endpoints": [
-                {
-                    "role": e.role,
-                    "patch": e.patch_path,
-                    "node": e.node_id,
-                    "domain": e.domain.value,
-                }
-                for e in self.endpoints
-            ],
+            "writers": [_endpoint_to_dict(e) for e in self.writers],
+            "readers": [_endpoint_to_dict(e) for e in self.readers],
         }
 
 
+def _endpoint_to_dict(endpoint: SymbolEndpointInfo) -> Dict[str, Any]:
+    """Serialize a symbol endpoint for the global symbol table."""
+    return {
+        "patch": endpoint.patch_path,
+        "node": endpoint.node_id,
+        "domain": endpoint.domain.value,
+    }
+
+
+def _endpoint_from_dict(ep_data: Dict[str, Any]) -> SymbolEndpointInfo:
+    """Deserialize a symbol endpoint written by _endpoint_to_dict."""
+    return SymbolEndpointInfo(
+        node_id=ep_data['node'],
+        patch_path=ep_data['patch'],
+        domain=Domain(ep_data.get('domain', 'control')),
+    )
+
+
 class SymbolExtractor:
     """Extracts symbols from Pure Data objects."""
 
@@ -76,11 +94,11 @@ class SymbolExtractor:
                      'soundfiler', 'tabsend~', 'tabreceive~'}
     DELAY_OBJECTS = {'delwrite~', 'delread~', 'delread4~', 'vd~'}
 
-    # Pattern for instance-local symbols
-    INSTANCE_LOCAL_PATTERN = re.compile(r'^\$0[-_]')
+    # Prefixes of instance-local symbols
+    INSTANCE_LOCAL_PREFIXES = ('$0-', '$0_')
 
     def __init__(self):
-        self._symbols: Dict[str, IRSymbol] = {}
+        self._symbols: Dict[Tuple[str, str, str], IRSymbol] = {}
         self._symbol_counter = 0
 
     def reset(self):
@@ -100,11 +118,11 @@ class SymbolExtractor:
         Returns:
             (resolved_symbol, namespace, instance_local)
         """
-        if self.INSTANCE_LOCAL_PATTERN.match(raw_symbol):
+        if raw_symbol.startswith(self.INSTANCE_LOCAL_PREFIXES):
             return (raw_symbol, SymbolNamespace.INSTANCE, True)
 
         # Check for hierarchical convention (path/symbol)
-        if '/' in raw_symbol and not raw_symbol.startswith('/'):
+        if raw_symbol.find('/') > 0:
             return (raw_symbol, SymbolNamespace.HIERARCHICAL, False)
 
         return (raw_symbol, SymbolNamespace.GLOBAL, False)
@@ -164,27 +182,26 @@ class SymbolExtractor:
         Returns an IRSymbol if the node participates in symbol communication,
         None otherwise.
         """
-        symbol_kind = self._get_symbol_kind(obj_type)
-        if symbol_kind is None:
+        info = _DISPATCH.get(obj_type)
+        if info is None and '/' in obj_type:
+            info = _DISPATCH.get(obj_type.rsplit('/', 1)[-1])  # Library prefix
+        if info is None:
             return None
 
         if not args:
             return None  # Symbol required but not provided
 
-        raw_symbol = str(args[0])
-        resolved, namespace, instance_local = self._parse_namespace(raw_symbol)
-        role = self._get_role(obj_type)
-        domain = self._get_domain_for_type(obj_type)
+        symbol_kind, role, domain = info
 
-        if role is None:
-            return None
+        # Interned so every send/receive on a name shares one string (and hash)
+        raw_symbol = sys.intern(args[0])
+        resolved, namespace, instance_local = self._parse_namespace(raw_symbol)
 
         # Check if we already have this symbol
         symbol_key = (symbol_kind.value, resolved, namespace.value)
-        key_str = f"{symbol_key[0]}:{symbol_key[1]}:{symbol_key[2]}"
 
-        if key_str in self._symbols:
-            symbol = self._symbols[key_str]
+        symbol = self._symbols.get(symbol_key)
+        if symbol is not None:
             endpoint = IRSymbolEndpoint(node=node_id)
             if role == "writer":
                 symbol.writers.append(endpoint)
@@ -210,7 +227,7 @@ class SymbolExtractor:
         else:
             symbol.readers.append(endpoint)
 
-        self._symbols[key_str] = symbol
+        self._symbols[symbol_key] = symbol
         return symbol
 
     def get_symbols(self) -> List[IRSymbol]:
@@ -227,41 +244,78 @@ class SymbolExtractor:
         edge_counter = 0
 
         for symbol in self._symbols.values():
-            # Create edges from each writer to each reader
-            for writer in symbol.writers:
-                for reader in symbol.readers:
-                    edge_counter += 1
-
-                    # Determine domain
-                    if symbol.kind in {SymbolKind.THROW_CATCH, SymbolKind.SEND_RECEIVE}:
-                        if '~' in symbol.raw or symbol.kind == SymbolKind.THROW_CATCH:
-                            domain = Domain.SIGNAL
-                        else:
-                            domain = Domain.CONTROL
-                    else:
-                        domain = Domain.CONTROL
-
-                    # Confidence based on namespace
-                    confidence = 1.0
-                    if symbol.instance_local:
-                        confidence = 0.7  # Lower confidence for $0- symbols
-                    elif symbol.namespace == SymbolNamespace.GLOBAL:
-                        confidence = 0.9
-
-                    edge = IREdge(
-                        id=f"e_sym{edge_counter}",
-                        kind=EdgeKind.SYMBOL,
-                        domain=domain,
-                        from_endpoint=IREdgeEndpoint(node=writer.node, outlet=0),
-                        to_endpoint=IREdgeEndpoint(node=reader.node, inlet=0),
-                        symbol=symbol.resolved,
-                        confidence=confidence,
-                    )
-                    edges.append(edge)
+            if not symbol.writers or not symbol.readers:
+                continue
+
+            # Determine domain
+            if symbol.kind == SymbolKind.THROW_CATCH:
+                domain = Domain.SIGNAL
+            elif symbol.kind == SymbolKind.SEND_RECEIVE and '~' in symbol.raw:
+                domain = Domain.SIGNAL
+            else:
+                domain = Domain.CONTROL
+
+            # Confidence based on namespace
+            confidence = 1.0
+            if symbol.instance_local:
+                confidence = 0.7  # Lower confidence for $0- symbols
+            elif symbol.namespace == SymbolNamespace.GLOBAL:
+                confidence = 0.9
+
+            # Create edges from each writer to each reader. Endpoints are
+            # built once per writer/reader and shared by all of its edges.
+            sources = [IREdgeEndpoint(w.node, 0, None) for w in symbol.writers]
+            targets = [IREdgeEndpoint(r.node, None, 0) for r in symbol.readers]
+            kind = EdgeKind.SYMBOL
+            resolved = symbol.resolved
+            edges.extend(
+                IREdge(f"e_sym{i}", kind, domain, src, dst, resolved, confidence)
+                for i, (src, dst) in enumerate(product(sources, targets), start=edge_counter + 1)
+            )
+            edge_counter += len(sources) * len(targets)
 
         return edges
 
 
+def _build_dispatch() -> Dict[str, Tuple[SymbolKind, str, Domain]]:
+    """
+    Precompute (kind, role, domain) for every symbol-bearing object type.
+
+    Types with a kind but no role (e.g. table definitions) are left out,
+    since extract_from_node ignores them anyway.
+    """
+    extractor = SymbolExtractor()
+    obj_types = (
+        SymbolExtractor.SEND_RECEIVE_WRITERS | SymbolExtractor.SEND_RECEIVE_READERS |
+        SymbolExtractor.THROW_CATCH_WRITERS | SymbolExtractor.THROW_CATCH_READERS |
+        SymbolExtractor.VALUE_OBJECTS | SymbolExtractor.ARRAY_OBJECTS |
+        SymbolExtractor.DELAY_OBJECTS
+    )
+
+    dispatch = {}
+    for obj_type in obj_types:
+        kind = extractor._get_symbol_kind(obj_type)
+        role = extractor._get_role(obj_type)
+        if kind is not None and role is not None:
+            dispatch[obj_type] = (kind, role, extractor._get_domain_for_type(obj_type))
+    return dispatch
+
+
+# Object type -> (kind, role, domain), consulted once per node
+_DISPATCH = _build_dispatch()
+
+
+# Version of the global symbol table file format
+INDEX_VERSION = "0.2"
+
+
+def _dumps(obj: Any) -> str:
+    """Encode obj as JSON with a 2-space indent, via orjson when available."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+
 class GlobalSymbolTable:
     """
     Global Symbol Table for cross-file symbol resolution.
@@ -270,13 +324,13 @@ class GlobalSymbolTable:
     """
 
     def __init__(self):
-        self._entries: Dict[str, GlobalSymbolEntry] = {}
+        self._entries: Dict[Tuple[str, str, str], GlobalSymbolEntry] = {}
         self._patches: Set[str] = set()
 
     def _make_key(self, kind: SymbolKind, resolved: str,
-                  namespace: SymbolNamespace) -> str:
+                  namespace: SymbolNamespace) -> Tuple[str, str, str]:
         """Generate a unique key for a symbol entry."""
-        return f"{kind.value}:{resolved}:{namespace.value}"
+        return (kind.value, resolved, namespace.value)
 
     def add_symbol(self, symbol: IRSymbol, patch_path: str,
                    node_id_map: Optional[Dict[str, str]] = None):
@@ -314,11 +368,10 @@ class GlobalSymbolTable:
             endpoint = SymbolEndpointInfo(
                 node_id=node_id,
                 patch_path=patch_path,
-                role="writer",
                 domain=domain,
                 port=writer.port,
             )
-            entry.endpoints.append(endpoint)
+            entry.writers.append(endpoint)
 
         for reader in symbol.readers:
             node_id = reader.node
@@ -328,11 +381,10 @@ class GlobalSymbolTable:
             endpoint = SymbolEndpointInfo(
                 node_id=node_id,
                 patch_path=patch_path,
-                role="reader",
                 domain=domain,
                 port=reader.port,
             )
-            entry.endpoints.append(endpoint)
+            entry.readers.append(endpoint)
 
     def add_patch_symbols(self, symbols: List[IRSymbol], patch_path: str,
                           node_id_map: Optional[Dict[str, str]] = None):
@@ -361,7 +413,7 @@ class GlobalSymbolTable:
         entry = self.get_symbol(kind, resolved, namespace)
         if entry is None:
             return []
-        return [e for e in entry.endpoints if e.role == "writer"]
+        return entry.writers
 
     def get_readers(self, kind: SymbolKind, resolved: str,
                     namespace: SymbolNamespace = SymbolNamespace.GLOBAL
@@ -370,7 +422,7 @@ class GlobalSymbolTable:
         entry = self.get_symbol(kind, resolved, namespace)
         if entry is None:
             return []
-        return [e for e in entry.endpoints if e.role == "reader"]
+        return entry.readers
 
     def get_cross_patch_connections(self) -> List[Dict[str, Any]]:
         """
@@ -381,12 +433,8 @@ class GlobalSymbolTable:
         connections = []
 
         for entry in self._entries.values():
-            patches_with_writers = set(
-                e.patch_path for e in entry.endpoints if e.role == "writer"
-            )
-            patches_with_readers = set(
-                e.patch_path for e in entry.endpoints if e.role == "reader"
-            )
+            patches_with_writers = {e.patch_path for e in entry.writers}
+            patches_with_readers = {e.patch_path for e in entry.readers}
 
             cross_patch_readers = patches_with_readers - patches_with_writers
 
@@ -410,8 +458,8 @@ class GlobalSymbolTable:
         readers_only = []
 
         for entry in self._entries.values():
-            has_writers = any(e.role == "writer" for e in entry.endpoints)
-            has_readers = any(e.role == "reader" for e in entry.endpoints)
+            has_writers = bool(entry.writers)
+            has_readers = bool(entry.readers)
 
             if has_writers and not has_readers:
                 writers_only.append(entry)
@@ -426,18 +474,29 @@ class GlobalSymbolTable:
     def to_dict(self) -> Dict[str, Any]:
         """Export the global symbol table to a dictionary."""
         return {
-            "index_version": "0.1",
+            "index_version": INDEX_VERSION,
             "symbols": [entry.to_dict() for entry in self._entries.values()],
         }
 
     def to_json(self, indent: int = 2) -> str:
         """Export the global symbol table to JSON."""
+        if indent == 2:
+            return _dumps(self.to_dict())
         return json.dumps(self.to_dict(), indent=indent)
 
     def save(self, filepath: str):
-        """Save the global symbol table to a file."""
-        with open(filepath, 'w') as f:
-            f.write(self.to_json())
+        """
+        Save the global symbol table to a file.
+
+        Entries are encoded one at a time, so only one entry's dict is alive
+        at once. The file matches to_json() byte for byte.
+        """
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(f'{{\n  "index_version": "{INDEX_VERSION}",\n  "symbols": [')
+            for i, entry in enumerate(self._entries.values()):
+                f.write(",\n    " if i else "\n    ")
+                f.write(_dumps(entry.to_dict()).replace("\n", "\n    "))
+            f.write("\n  ]\n}" if self._entries else "]\n}")
 
     @classmethod
     def load(cls, filepath: str) -> 'GlobalSymbolTable':
@@ -461,14 +520,13 @@ class GlobalSymbolTable:
                 instance_local=sym_data.get('instance_local', False),
             )
 
+            entry.writers.extend(_endpoint_from_dict(ep) for ep in sym_data.get('writers', []))
+            entry.readers.extend(_endpoint_from_dict(ep) for ep in sym_data.get('readers', []))
+
+            # Tables written before the split store one role-tagged list
             for ep_data in sym_data.get('endpoints', []):
-                endpoint = SymbolEndpointInfo(
-                    node_id=ep_data['node'],
-                    patch_path=ep_data['patch'],
-                    role=ep_data['role'],
-                    domain=Domain(ep_data.get('domain', 'control')),
-                )
-                entry.endpoints.append(endpoint)
+                endpoints = entry.writers if ep_data.get('role') == "writer" else entry.readers
+                endpoints.append(_endpoint_from_dict(ep_data))
 
             gst._entries[key] = entry
 
@@ -5,14 +5,71 @@ Generates SVG diagrams from IR, showing objects and connections
 with color-coded signal vs control paths.
 """
 
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
-from xml.etree import ElementTree as ET
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
 
 from .core import IRPatch, IRNode, IREdge, EdgeKind, Domain, NodeKind
 
 
-@dataclass
+# Patches sit on an integer pixel grid, so most coordinates are small whole
+# numbers whose strings can be looked up instead of formatted
+_COORD_STR = tuple(str(i) for i in range(2048))
+
+
+def _fmt(v: float) -> str:
+    """Format a coordinate: whole numbers bare, anything else to two decimals."""
+    i = int(v)
+    if i == v:
+        return _COORD_STR[i] if 0 <= i < 2048 else str(i)
+    return f"{v:.2f}"
+
+
+# XML escapes for box text, applied in one C-level pass
+_ESC_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def _escape(text: str) -> str:
+    """Escape box text for XML; plain identifiers (most object names) pass as-is."""
+    if text.isidentifier():
+        return text
+    return text.translate(_ESC_TABLE)
+
+
+# Markup templates; coordinates are passed in already formatted by _fmt
+_SVG_OPEN_TMPL = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="{x} {y} {w} {h}" '
+    'width="{w}" height="{h}">'
+)
+_BACKGROUND_TMPL = '<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="{fill}" />'
+_RECT_TMPL = '<rect x="{x}" y="{y}" width="{w}" height="{h}" class="{c}" />'
+_POLY_TMPL = '<polygon points="{points}" class="{c}" />'
+_POINTS_TMPL = "{x},{y} {r},{y} {rn},{m} {r},{b} {x},{b} {xn},{m}"
+_TEXT_TMPL = '<text x="{x}" y="{y}" class="{c}">{text}</text>'
+_WIRES_TMPL = '<path d="{d}" class="{c}" />'
+_LINE_SEG_TMPL = "M {x1} {y1} L {x2} {y2}"
+_CURVE_SEG_TMPL = "M {x1} {y1} C {x1} {my}, {x2} {my}, {x2} {y2}"
+
+
+def _box_classes(kind: NodeKind, domain: Domain) -> Tuple[str, str]:
+    """Get the (box class, text class) pair for a node kind and domain."""
+    if kind == NodeKind.COMMENT:
+        return ("box box-comment", "text text-comment")
+    if kind == NodeKind.MESSAGE:
+        return ("box box-message", "text text-control")
+    if domain == Domain.SIGNAL:
+        return ("box box-signal", "text text-signal")
+    return ("box box-control", "text text-control")
+
+
+# Every (kind, domain) pair resolved up front, so drawing a box is one lookup
+_CLASS_MAP = {(kind, domain): _box_classes(kind, domain)
+              for kind in NodeKind for domain in Domain}
+
+
+@dataclass(slots=True)
 class Box:
     """A rendered object box."""
     id: str
@@ -25,7 +82,7 @@ class Box:
     kind: NodeKind
 
 
-@dataclass
+@dataclass(slots=True)
 class Wire:
     """A rendered connection wire."""
     from_x: float
@@ -58,92 +115,146 @@ class SVGRenderer:
         self.ir = ir_patch
         self.boxes: Dict[str, Box] = {}
         self.wires: List[Wire] = []
+        self._boxes_by_canvas: Dict[str, List[Box]] = defaultdict(list)
+        self._wires_by_canvas: Dict[str, List[Wire]] = defaultdict(list)
+        self._bounds_by_canvas: Dict[str, List[float]] = {}  # [min_x, min_y, max_x, max_y]
+        self._inlet_counts: Dict[str, int] = {}
+        self._outlet_counts: Dict[str, int] = {}
+        self._inlet_xs: Dict[str, List[float]] = {}
+        self._outlet_xs: Dict[str, List[float]] = {}
         self._build()
 
     def _build(self):
         """Build boxes and wires from IR."""
+        char_width = self.CHAR_WIDTH
+        padding = self.BOX_PADDING * 2
+        min_width = self.MIN_BOX_WIDTH
+        box_height = self.BOX_HEIGHT
+        bounds_by_canvas = self._bounds_by_canvas
+
         # Create boxes for all nodes
         for node in self.ir.nodes:
+            # Port counts, looked up per wire below
+            if node.io:
+                if node.io.inlets:
+                    self._inlet_counts[node.id] = len(node.io.inlets)
+                if node.io.outlets:
+                    self._outlet_counts[node.id] = len(node.io.outlets)
+
             if not node.layout:
                 continue
 
             # Calculate text and width
             text = self._node_text(node)
-            width = max(
-                len(text) * self.CHAR_WIDTH + self.BOX_PADDING * 2,
-                self.MIN_BOX_WIDTH
-            )
+            width = max(len(text) * char_width + padding, min_width)
 
-            self.boxes[node.id] = Box(
+            x, y = node.layout.x, node.layout.y
+            box = Box(
                 id=node.id,
-                x=node.layout.x,
-                y=node.layout.y,
+                x=x,
+                y=y,
                 width=width,
-                height=self.BOX_HEIGHT,
+                height=box_height,
                 text=text,
                 domain=node.domain or Domain.CONTROL,
                 kind=node.kind,
             )
+            self.boxes[node.id] = box
+            canvas = node.id.partition("::")[0]
+            self._boxes_by_canvas[canvas].append(box)
+
+            # Running canvas bounds, so render needs no scan over the boxes
+            right = x + width
+            bottom = y + box_height
+            bounds = bounds_by_canvas.get(canvas)
+            if bounds is None:
+                bounds_by_canvas[canvas] = [x, y, right, bottom]
+            else:
+                if x < bounds[0]:
+                    bounds[0] = x
+                if y < bounds[1]:
+                    bounds[1] = y
+                if right > bounds[2]:
+                    bounds[2] = right
+                if bottom > bounds[3]:
+                    bounds[3] = bottom
+
+            # Port positions, so each wire end is a list index
+            self._inlet_xs[node.id] = self._port_xs(box, self._get_inlet_count(node.id))
+            self._outlet_xs[node.id] = self._port_xs(box, self._get_outlet_count(node.id))
+
+        # Create wires for all edges. Lookups are bound to locals since this
+        # loop runs once per connection.
+        get_box = self.boxes.get
+        outlet_xs_of = self._outlet_xs
+        inlet_xs_of = self._inlet_xs
+        append_wire = self.wires.append
+        wires_by_canvas = self._wires_by_canvas
+        wire_kind = EdgeKind.WIRE
 
-        # Create wires for all edges
         for edge in self.ir.edges:
-            if edge.kind != EdgeKind.WIRE:
+            if edge.kind != wire_kind:
                 continue
 
-            from_box = self.boxes.get(edge.from_endpoint.node)
-            to_box = self.boxes.get(edge.to_endpoint.node)
+            src = edge.from_endpoint.node
+            dst = edge.to_endpoint.node
+            from_box = get_box(src)
+            to_box = get_box(dst)
 
             if not from_box or not to_box:
                 continue
 
             # Calculate outlet position (bottom of source box)
-            num_outlets = self._get_outlet_count(edge.from_endpoint.node)
+            outlet_xs = outlet_xs_of[src]
             outlet_idx = edge.from_endpoint.outlet or 0
-            from_x = self._port_x(from_box, outlet_idx, num_outlets)
+            if outlet_idx < len(outlet_xs):
+                from_x = outlet_xs[outlet_idx]
+            else:
+                from_x = self._port_x(from_box, outlet_idx, self._get_outlet_count(src))
             from_y = from_box.y + from_box.height
 
             # Calculate inlet position (top of dest box)
-            num_inlets = self._get_inlet_count(edge.to_endpoint.node)
+            inlet_xs = inlet_xs_of[dst]
             inlet_idx = edge.to_endpoint.inlet or 0
-            to_x = self._port_x(to_box, inlet_idx, num_inlets)
+            if inlet_idx < len(inlet_xs):
+                to_x = inlet_xs[inlet_idx]
+            else:
+                to_x = self._port_x(to_box, inlet_idx, self._get_inlet_count(dst))
             to_y = to_box.y
 
-            self.wires.append(Wire(
+            wire = Wire(
                 from_x=from_x,
                 from_y=from_y,
                 to_x=to_x,
                 to_y=to_y,
                 domain=edge.domain or Domain.CONTROL,
-            ))
+            )
+            append_wire(wire)
+
+            # Node ids are "<canvas>::<hash>"; wires belong to their source's canvas
+            wires_by_canvas[src.partition("::")[0]].append(wire)
 
     def _node_text(self, node: IRNode) -> str:
         """Get display text for a node."""
+        args = node.args
         if node.kind == NodeKind.COMMENT:
             return node.text or ""
         elif node.kind == NodeKind.MESSAGE:
-            return " ".join(str(a) for a in node.args) if node.args else "bang"
+            return " ".join(args) if args else "bang"
 
         # Object: type + args
-        parts = [node.type]
-        if node.args:
-            parts.extend(str(a) for a in node.args[:3])  # Limit args shown
-            if len(node.args) > 3:
-                parts.append("...")
-        return " ".join(parts)
+        if not args:
+            return node.type
+        text = " ".join(chain((node.type,), islice(args, 3)))  # Limit args shown
+        return text + " ..." if len(args) > 3 else text
 
     def _get_inlet_count(self, node_id: str) -> int:
         """Get number of inlets for a node."""
-        node = self.ir.get_node(node_id)
-        if node and node.io and node.io.inlets:
-            return len(node.io.inlets)
-        return 1
+        return self._inlet_counts.get(node_id, 1)
 
     def _get_outlet_count(self, node_id: str) -> int:
         """Get number of outlets for a node."""
-        node = self.ir.get_node(node_id)
-        if node and node.io and node.io.outlets:
-            return len(node.io.outlets)
-        return 1
+        return self._outlet_counts.get(node_id, 1)
 
     def _port_x(self, box: Box, port_idx: int, num_ports: int) -> float:
         """Calculate x position of a port (inlet/outlet)."""
@@ -156,163 +267,166 @@ class SVGRenderer:
         spacing = usable_width / (num_ports - 1) if num_ports > 1 else 0
         return box.x + margin + port_idx * spacing
 
+    def _port_xs(self, box: Box, num_ports: int) -> List[float]:
+        """Calculate x positions of all ports along one edge of a box."""
+        if num_ports <= 1:
+            return [box.x + box.width / 2]
+
+        # Distribute ports evenly, as in _port_x
+        margin = self.BOX_PADDING
+        spacing = (box.width - margin * 2) / (num_ports - 1)
+        start = box.x + margin
+        return [start + idx * spacing for idx in range(num_ports)]
+
     def render(self, canvas_id: str = "c0") -> str:
         """Render the patch as SVG."""
-        # Filter to canvas
-        canvas_boxes = {k: v for k, v in self.boxes.items()
-                        if k.startswith(canvas_id + "::")}
-        canvas_wires = [w for w in self.wires]  # TODO: filter by canvas
+        parts: List[str] = []
+        self._emit(parts.append, canvas_id)
+        return "".join(parts)
 
-        if not canvas_boxes:
-            canvas_boxes = self.boxes  # Fallback to all
+    def render_to(self, out: TextIO, canvas_id: str = "c0"):
+        """Render the patch as SVG, writing fragments straight to a text stream.
 
-        # Calculate bounds
-        if not canvas_boxes:
-            return self._empty_svg()
+        Args:
+            out: Text stream to write to (e.g. an open file or StringIO)
+            canvas_id: Which canvas to render
+        """
+        self._emit(out.write, canvas_id)
 
-        min_x = min(b.x for b in canvas_boxes.values()) - 20
-        min_y = min(b.y for b in canvas_boxes.values()) - 20
-        max_x = max(b.x + b.width for b in canvas_boxes.values()) + 20
-        max_y = max(b.y + b.height for b in canvas_boxes.values()) + 40
+    def _emit(self, write: Callable[[str], Any], canvas_id: str):
+        """Pass each SVG fragment of a canvas to write, in document order."""
+        # Filter to canvas
+        canvas_boxes = self._boxes_by_canvas.get(canvas_id)
+        canvas_wires = self._wires_by_canvas.get(canvas_id, [])
+
+        if canvas_boxes:
+            min_x, min_y, max_x, max_y = self._bounds_by_canvas[canvas_id]
+        elif self.boxes:
+            canvas_boxes = list(self.boxes.values())  # Fallback to all
+            canvas_wires = self.wires
+            min_x, min_y, max_x, max_y = self._overall_bounds()
+        else:
+            write(self._empty_svg())
+            return
+
+        min_x -= 20
+        min_y -= 20
+        max_x += 20
+        max_y += 40
 
         width = max_x - min_x
         height = max_y - min_y
 
-        # Create SVG
-        svg = ET.Element("svg", {
-            "xmlns": "http://www.w3.org/2000/svg",
-            "viewBox": f"{min_x} {min_y} {width} {height}",
-            "width": str(width),
-            "height": str(height),
-        })
-
-        # Add styles
-        style = ET.SubElement(svg, "style")
-        style.text = self._css()
-
-        # Add background
-        ET.SubElement(svg, "rect", {
-            "x": str(min_x),
-            "y": str(min_y),
-            "width": str(width),
-            "height": str(height),
-            "fill": self.BACKGROUND,
-        })
+        x, y, w, h = _fmt(min_x), _fmt(min_y), _fmt(width), _fmt(height)
+        write(_SVG_OPEN_TMPL.format(x=x, y=y, w=w, h=h))
+        write(f'<style>{self._css()}</style>')
+        write(_BACKGROUND_TMPL.format(x=x, y=y, w=w, h=h, fill=self.BACKGROUND))
 
         # Draw wires first (behind boxes)
-        wires_group = ET.SubElement(svg, "g", {"class": "wires"})
-        for wire in canvas_wires:
-            self._draw_wire(wires_group, wire)
+        write('<g class="wires">')
+        self._draw_wires(write, canvas_wires)
+        write('</g>')
 
         # Draw boxes
-        boxes_group = ET.SubElement(svg, "g", {"class": "boxes"})
-        for box in canvas_boxes.values():
-            self._draw_box(boxes_group, box)
-
-        return ET.tostring(svg, encoding="unicode")
-
-    def _css(self) -> str:
-        """Generate CSS styles."""
+        write('<g class="boxes">')
+        for box in canvas_boxes:
+            self._draw_box(write, box)
+        write('</g></svg>')
+
+    def _overall_bounds(self) -> Tuple[float, float, float, float]:
+        """Get (min_x, min_y, max_x, max_y) over all canvases."""
+        all_bounds = self._bounds_by_canvas.values()
+        return (
+            min(b[0] for b in all_bounds),
+            min(b[1] for b in all_bounds),
+            max(b[2] for b in all_bounds),
+            max(b[3] for b in all_bounds),
+        )
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _css(cls) -> str:
+        """Generate CSS styles (built once per renderer class)."""
         return f"""
             .box {{ stroke-width: 1.5; }}
-            .box-signal {{ stroke: {self.SIGNAL_COLOR}; fill: {self.SIGNAL_FILL}; }}
-            .box-control {{ stroke: {self.CONTROL_COLOR}; fill: {self.CONTROL_FILL}; }}
-            .box-message {{ stroke: {self.CONTROL_COLOR}; fill: {self.MESSAGE_FILL}; }}
+            .box-signal {{ stroke: {cls.SIGNAL_COLOR}; fill: {cls.SIGNAL_FILL}; }}
+            .box-control {{ stroke: {cls.CONTROL_COLOR}; fill: {cls.CONTROL_FILL}; }}
+            .box-message {{ stroke: {cls.CONTROL_COLOR}; fill: {cls.MESSAGE_FILL}; }}
             .box-comment {{ stroke: none; fill: none; }}
-            .wire-signal {{ stroke: {self.SIGNAL_COLOR}; stroke-width: 2; fill: none; }}
-            .wire-control {{ stroke: {self.CONTROL_COLOR}; stroke-width: 1.5; fill: none; }}
+            .wire-signal {{ stroke: {cls.SIGNAL_COLOR}; stroke-width: 2; fill: none; }}
+            .wire-control {{ stroke: {cls.CONTROL_COLOR}; stroke-width: 1.5; fill: none; }}
             .text {{ font-family: Monaco, 'Courier New', monospace; font-size: 11px; }}
-            .text-signal {{ fill: {self.SIGNAL_COLOR}; }}
-            .text-control {{ fill: {self.CONTROL_COLOR}; }}
-            .text-comment {{ fill: {self.COMMENT_COLOR}; font-style: italic; }}
+            .text-signal {{ fill: {cls.SIGNAL_COLOR}; }}
+            .text-control {{ fill: {cls.CONTROL_COLOR}; }}
+            .text-comment {{ fill: {cls.COMMENT_COLOR}; font-style: italic; }}
         """
 
-    def _draw_box(self, parent: ET.Element, box: Box):
+    def _draw_box(self, write: Callable[[str], Any], box: Box):
         """Draw a single box."""
-        g = ET.SubElement(parent, "g")
-
         # Determine class based on kind and domain
-        if box.kind == NodeKind.COMMENT:
-            box_class = "box box-comment"
-            text_class = "text text-comment"
-        elif box.kind == NodeKind.MESSAGE:
-            box_class = "box box-message"
-            text_class = "text text-control"
-        elif box.domain == Domain.SIGNAL:
-            box_class = "box box-signal"
-            text_class = "text text-signal"
-        else:
-            box_class = "box box-control"
-            text_class = "text text-control"
+        key = (box.kind, box.domain)
+        box_class, text_class = _CLASS_MAP.get(key) or _box_classes(*key)
+
+        write('<g>')
 
         # Draw rectangle (skip for comments)
         if box.kind != NodeKind.COMMENT:
             if box.kind == NodeKind.MESSAGE:
                 # Message box: flag shape
                 points = self._message_points(box)
-                ET.SubElement(g, "polygon", {
-                    "points": points,
-                    "class": box_class,
-                })
+                write(_POLY_TMPL.format(points=points, c=box_class))
             else:
                 # Regular object box
-                ET.SubElement(g, "rect", {
-                    "x": str(box.x),
-                    "y": str(box.y),
-                    "width": str(box.width),
-                    "height": str(box.height),
-                    "class": box_class,
-                })
-
-        # Draw text
-        text = ET.SubElement(g, "text", {
-            "x": str(box.x + self.BOX_PADDING),
-            "y": str(box.y + box.height - 6),
-            "class": text_class,
-        })
-        text.text = box.text
+                write(_RECT_TMPL.format(
+                    x=_fmt(box.x), y=_fmt(box.y), w=_fmt(box.width), h=_fmt(box.height),
+                    c=box_class))
+
+        # Draw text (the only free-form content, so the only thing escaped)
+        write(_TEXT_TMPL.format(
+            x=_fmt(box.x + self.BOX_PADDING), y=_fmt(box.y + box.height - 6),
+            c=text_class, text=_escape(box.text)))
+        write('</g>')
 
     def _message_points(self, box: Box) -> str:
         """Generate polygon points for message box (flag shape)."""
         x, y, w, h = box.x, box.y, box.width, box.height
         notch = 4
-        return f"{x},{y} {x+w},{y} {x+w+notch},{y+h/2} {x+w},{y+h} {x},{y+h} {x+notch},{y+h/2}"
-
-    def _draw_wire(self, parent: ET.Element, wire: Wire):
-        """Draw a connection wire."""
-        wire_class = "wire-signal" if wire.domain == Domain.SIGNAL else "wire-control"
-
-        # Simple straight line for now
-        # Could use bezier curves for more complex routing
-        if abs(wire.to_y - wire.from_y) < 30:
-            # Short connection: straight line
-            ET.SubElement(parent, "line", {
-                "x1": str(wire.from_x),
-                "y1": str(wire.from_y),
-                "x2": str(wire.to_x),
-                "y2": str(wire.to_y),
-                "class": wire_class,
-            })
-        else:
-            # Longer connection: curved path
-            mid_y = (wire.from_y + wire.to_y) / 2
-            d = f"M {wire.from_x} {wire.from_y} C {wire.from_x} {mid_y}, {wire.to_x} {mid_y}, {wire.to_x} {wire.to_y}"
-            ET.SubElement(parent, "path", {
-                "d": d,
-                "class": wire_class,
-            })
+        return _POINTS_TMPL.format(
+            x=_fmt(x), y=_fmt(y), r=_fmt(x + w), rn=_fmt(x + w + notch),
+            m=_fmt(y + h / 2), b=_fmt(y + h), xn=_fmt(x + notch))
+
+    def _draw_wires(self, write: Callable[[str], Any], wires: List[Wire]):
+        """Draw connection wires: short ones straight, longer ones curved.
+
+        All wires of one class go into a single <path>, one subpath each.
+        """
+        segments: Dict[str, List[str]] = {"wire-control": [], "wire-signal": []}
+        control = segments["wire-control"]
+        signal = segments["wire-signal"]
+
+        for wire in wires:
+            from_x, from_y = _fmt(wire.from_x), _fmt(wire.from_y)
+            to_x, to_y = _fmt(wire.to_x), _fmt(wire.to_y)
+            if abs(wire.to_y - wire.from_y) < 30:
+                # Short connection: straight line
+                segment = _LINE_SEG_TMPL.format(x1=from_x, y1=from_y, x2=to_x, y2=to_y)
+            else:
+                # Longer connection: curved path
+                mid_y = _fmt((wire.from_y + wire.to_y) / 2)
+                segment = _CURVE_SEG_TMPL.format(
+                    x1=from_x, y1=from_y, x2=to_x, y2=to_y, my=mid_y)
+            (signal if wire.domain == Domain.SIGNAL else control).append(segment)
+
+        for wire_class, parts in segments.items():
+            if parts:
+                write(_WIRES_TMPL.format(d=" ".join(parts), c=wire_class))
 
     def _empty_svg(self) -> str:
         """Return an empty SVG."""
-        svg = ET.Element("svg", {
-            "xmlns": "http://www.w3.org/2000/svg",
-            "viewBox": "0 0 200 100",
-            "width": "200",
-            "height": "100",
-        })
-        text = ET.SubElement(svg, "text", {"x": "50", "y": "50"})
-        text.text = "Empty patch"
-        return ET.tostring(svg, encoding="unicode")
+        return (
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 200 100" width="200" height="100">'
+            '<text x="50" y="50">Empty patch</text></svg>'
+        )
 
 
 def render_svg(ir_patch: IRPatch, canvas_id: str = "c0") -> str:
@@ -329,6 +443,19 @@ def render_svg(ir_patch: IRPatch, canvas_id: str = "c0") -> str:
     return renderer.render(canvas_id)
 
 
+def render_svg_to_file(ir_patch: IRPatch, filepath: str, canvas_id: str = "c0"):
+    """Render a patch as SVG straight into a file.
+
+    Args:
+        ir_patch: The IR representation of the patch
+        filepath: Path of the .svg file to write
+        canvas_id: Which canvas to render (default: main canvas)
+    """
+    renderer = SVGRenderer(ir_patch)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        renderer.render_to(f, canvas_id)
+
+
 def render_svg_from_file(filepath: str, canvas_id: str = "c0") -> str:
     """Render a .pd file as SVG.
 